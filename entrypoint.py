@@ -1,25 +1,47 @@
 """PC Duration Alert - Monitors drivers in Personal Conveyance status."""
 import os
 import json
+import types
 import requests
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timezone
 from samsarafnsecrets import get_secrets
 
 DEFAULT_PC_THRESHOLD = 16.0
+PC_STATUS = "personalConveyance"
+HOS_CLOCKS_PAGE_LIMIT = 512  # API maximum; fewer pages means fewer serial round trips
+HOS_CLOCKS_URL = f"https://api.samsara.com/fleet/hos/clocks?limit={HOS_CLOCKS_PAGE_LIMIT}"
+HOS_CLOCKS_TIMEOUT_SECONDS = 30
+
+_EMPTY = types.MappingProxyType({})  # shared read-only default for missing clock fields
+
+# Shared across pages and warm invocations so keep-alive connections are reused
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    # Retry-After is not honoured so a throttled page cannot stall the invocation
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=False,
+    ),
+))
 
 def get_hos_clocks(api_token):
-    """Fetch HOS clocks from Samsara API."""
-    headers = {"Authorization": f"Bearer {api_token}"}
-    clocks = []
-    url = "https://api.samsara.com/fleet/hos/clocks"
+    """Fetch HOS clocks from Samsara API, yielding one page of clocks at a time."""
+    _session.headers["Authorization"] = f"Bearer {api_token}"
+    url = HOS_CLOCKS_URL
     while url:
-        response = requests.get(url, headers=headers)
+        response = _session.get(url, timeout=HOS_CLOCKS_TIMEOUT_SECONDS)
         response.raise_for_status()
         data = response.json()
-        clocks.extend(data.get("data", []))
+        yield data.get("data", [])
         pagination = data.get("pagination", {})
-        url = f"https://api.samsara.com/fleet/hos/clocks?after={pagination.get('endCursor')}" if pagination.get("hasNextPage") else None
-    return clocks
+        url = f"{HOS_CLOCKS_URL}&after={quote(pagination['endCursor'], safe='')}" if pagination.get("hasNextPage") else None
 
 def main(event, _):
     """Main handler - Handler: entrypoint.main"""
@@ -50,45 +72,63 @@ def main(event, _):
     threshold = float(event.get("pc_threshold_hours", DEFAULT_PC_THRESHOLD))
     print(corr_id, f"Threshold: {threshold} hours")
     
-    # 4. Fetch HOS clocks
-    try:
-        clocks = get_hos_clocks(api_token)
-        print(corr_id, f"Retrieved {len(clocks)} driver clocks")
-    except Exception as e:
-        print(corr_id, f"API error: {e}")
-        return {"error": str(e)}
-    
-    # 5. Analyze for PC duration
+    # 4. Fetch HOS clocks and analyze each page for PC duration as it arrives,
+    #    so only one page of clocks is held in memory at a time
+    drivers_checked = 0
     alerts = []
+    drivers_in_violation = []  # driver names in violation, for easy visibility
     drivers_in_pc = 0
-    now = datetime.now(timezone.utc)
+    parse_errors = []
+    now_ts = datetime.now(timezone.utc).timestamp()
+    # Anything that entered PC at or before the cutoff has exceeded the threshold
+    cutoff_ts = now_ts - threshold * 3600
+    # Bound as locals once so the per-clock loop does no global/attribute lookups
+    pc_status = PC_STATUS
+    parse_iso = datetime.fromisoformat
     
-    for clock in clocks:
-        driver = clock.get("driver", {})
-        status = clock.get("currentDutyStatus", {})
-        if status.get("hosStatusType") == "personalConveyance":
-            drivers_in_pc += 1
-            start_str = status.get("hosStatusStartTime")
-            if start_str:
+    try:
+        for page in get_hos_clocks(api_token):
+            drivers_checked += len(page)
+            for clock in page:
+                status = clock.get("currentDutyStatus") or _EMPTY
+                if status.get("hosStatusType") != pc_status:
+                    continue
+                drivers_in_pc += 1
+                start_str = status.get("hosStatusStartTime")
+                if not start_str:
+                    continue
                 try:
-                    hours = (now - datetime.fromisoformat(start_str.replace("Z", "+00:00"))).total_seconds() / 3600
-                    if hours >= threshold:
-                        alerts.append({
-                            "driver_id": driver.get("id"),
-                            "driver_name": driver.get("name"),
-                            "hours_in_pc": round(hours, 2),
-                            "pc_start_time": start_str
-                        })
+                    start_dt = parse_iso(start_str)
+                    if start_dt.tzinfo is None:
+                        raise ValueError(f"missing UTC offset: {start_str!r}")
+                    start_ts = start_dt.timestamp()
                 except Exception as e:
-                    print(corr_id, f"Parse error: {e}")
+                    parse_errors.append(f"Parse error: {e}")
+                    continue
+                if start_ts <= cutoff_ts:
+                    driver = clock.get("driver") or _EMPTY
+                    driver_name = driver.get("name")
+                    hours = round((now_ts - start_ts) / 3600, 2)
+                    alerts.append({
+                        "driver_id": driver.get("id"),
+                        "driver_name": driver_name,
+                        "hours_in_pc": hours,
+                        "pc_start_time": start_str
+                    })
+                    drivers_in_violation.append(f"{driver_name} ({hours}h)")
+    except Exception as e:
+        print(corr_id, f"API error: {e}")
+        return {"error": str(e)}
+    print(corr_id, f"Retrieved {drivers_checked} driver clocks")
     
-    # Build list of driver names in violation for easy visibility
-    drivers_in_violation = [f"{a['driver_name']} ({a['hours_in_pc']}h)" for a in alerts]
+    # Emit parse errors as one write rather than one print per driver
+    if parse_errors:
+        print("\n".join(f"{corr_id} {msg}" for msg in parse_errors))
     
     result = {
         "success": True,
         "summary": {
-            "drivers_checked": len(clocks),
+            "drivers_checked": drivers_checked,
             "drivers_in_pc": drivers_in_pc,
             "alerts_triggered": len(alerts),
             "threshold_hours": threshold,
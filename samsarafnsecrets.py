@@ -1,16 +1,48 @@
 """Secrets helper using AWS SSM Parameter Store with role chaining."""
 import os
-import json
+import time
+from datetime import datetime, timezone
 import boto3
+from botocore.config import Config
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+CREDENTIALS_EXPIRY_SKEW_SECONDS = 60
+DEFAULT_SECRETS_TTL_SECONDS = 300
+
+def _read_secrets_ttl():
+    """Parse SECRETS_TTL_SECONDS, falling back to the default on a bad value."""
+    raw = os.environ.get("SECRETS_TTL_SECONDS")
+    if raw is None:
+        return DEFAULT_SECRETS_TTL_SECONDS
+    try:
+        return int(raw)
+    except ValueError:
+        print(f"Invalid SECRETS_TTL_SECONDS {raw!r}, using {DEFAULT_SECRETS_TTL_SECONDS}")
+        return DEFAULT_SECRETS_TTL_SECONDS
+
+# Lambda env vars are fixed for the life of the container, so read once at import
+SECRETS_TTL_SECONDS = _read_secrets_ttl()
 
 _credentials = None
+_credentials_expiration = None
+_secrets_cache = {"value": None, "expires": 0.0}
+_ssm_client = None
+_ssm_client_for_token = None
+
+_SSM_CONFIG = Config(max_pool_connections=10, retries={"max_attempts": 3, "mode": "adaptive"})
 
 def get_credentials(force_refresh=False):
-    """Assume the exec role to get privileged credentials."""
-    global _credentials
+    """Assume the exec role to get privileged credentials (refreshed before STS expiry)."""
+    global _credentials, _credentials_expiration
     if _credentials is not None and not force_refresh:
-        return _credentials
-    
+        remaining = (_credentials_expiration - datetime.now(timezone.utc)).total_seconds()
+        if remaining > CREDENTIALS_EXPIRY_SKEW_SECONDS:
+            return _credentials
+
     sts = boto3.client("sts")
     res = sts.assume_role(
         RoleArn=os.environ["SamsaraFunctionExecRoleArn"],
@@ -21,21 +53,37 @@ def get_credentials(force_refresh=False):
         "aws_secret_access_key": res["Credentials"]["SecretAccessKey"],
         "aws_session_token": res["Credentials"]["SessionToken"],
     }
+    _credentials_expiration = res["Credentials"]["Expiration"]
     return _credentials
 
+def get_ssm_client(creds):
+    """Return an SSM client for the given credentials, reused until they rotate."""
+    global _ssm_client, _ssm_client_for_token
+    if _ssm_client is None or creds["aws_session_token"] != _ssm_client_for_token:
+        _ssm_client = boto3.session.Session(**creds).client("ssm", config=_SSM_CONFIG)
+        _ssm_client_for_token = creds["aws_session_token"]
+    return _ssm_client
+
 def get_secrets():
-    """Fetch secrets from SSM Parameter Store."""
+    """Fetch secrets from SSM Parameter Store, cached across warm invocations."""
+    if time.monotonic() < _secrets_cache["expires"]:
+        return _secrets_cache["value"]
+
     secrets_path = os.environ.get("SamsaraFunctionSecretsPath")
     if not secrets_path:
         return {}
-    
+
     creds = get_credentials()
-    ssm = boto3.client("ssm", **creds)
-    
+    ssm = get_ssm_client(creds)
+
     try:
         response = ssm.get_parameter(Name=secrets_path, WithDecryption=True)
         value = response["Parameter"]["Value"]
-        return json.loads(value)
+        secrets = _json_loads(value)
     except Exception as e:
         print(f"Error fetching secrets: {e}")
         return {}
+
+    _secrets_cache["value"] = secrets
+    _secrets_cache["expires"] = time.monotonic() + SECRETS_TTL_SECONDS
+    return secrets